@@ -9,8 +9,9 @@ import json
 import threading
 import subprocess
 import sys
+import time
 from http import HTTPStatus
-from http.server import SimpleHTTPRequestHandler, HTTPServer
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from datetime import datetime
 import os
@@ -21,6 +22,66 @@ from urllib.parse import parse_qs
 
 ROOT = Path('.').absolute()
 
+# In-flight /generate jobs keyed by client-supplied job_id, so /cancel can
+# kill the running pipeline step for a press that is no longer wanted.
+JOBS = {}
+JOBS_LOCK = threading.Lock()
+# Cancels that arrived before their /generate registered, and recently finished
+# jobs (so a late cancel does not leave a marker behind): job_id -> time.monotonic().
+EARLY_CANCELS = {}
+FINISHED_JOBS = {}
+EARLY_CANCEL_TTL_S = 60.0
+
+
+def _prune(records, now):
+    for stale in [k for k, t in records.items() if now - t > EARLY_CANCEL_TTL_S]:
+        del records[stale]
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def run_step(job_id, cmd):
+    """Run one pipeline step, tracking the process under job_id so it can be cancelled."""
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if job is not None and job['cancelled']:
+            raise JobCancelled(job_id)
+        proc = subprocess.Popen(cmd)
+        if job is not None:
+            job['proc'] = proc
+    rc = proc.wait()
+    with JOBS_LOCK:
+        if job is not None:
+            job['proc'] = None
+            if job['cancelled']:
+                raise JobCancelled(job_id)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
+
+
+def cancel_job(job_id) -> bool:
+    """Cancel job_id. Returns False if it is not running.
+
+    A job that has not arrived yet is rejected when its /generate comes in; a
+    recently finished job is left alone.
+    """
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if job is None:
+            now = time.monotonic()
+            _prune(EARLY_CANCELS, now)
+            _prune(FINISHED_JOBS, now)
+            if job_id not in FINISHED_JOBS:
+                EARLY_CANCELS[job_id] = now
+            return False
+        job['cancelled'] = True
+        proc = job['proc']
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+    return True
+
 
 def timestamp(prefix='output') -> str:
     return datetime.now().strftime(f"{prefix}-%Y%m%d-%H%M%S-%f")
@@ -52,11 +113,7 @@ class APIHandler(SimpleHTTPRequestHandler):
         # Delegate to default behavior for static files
         return super().do_GET()
 
-    def do_POST(self):
-        if self.path != '/generate':
-            self.send_error(HTTPStatus.NOT_FOUND, 'Unknown endpoint')
-            return
-
+    def _read_params(self):
         length = int(self.headers.get('Content-Length', '0'))
         body = self.rfile.read(length).decode('utf-8') if length else ''
         params = {}
@@ -65,11 +122,39 @@ class APIHandler(SimpleHTTPRequestHandler):
                 params = json.loads(body)
             except Exception:
                 params = parse_qs(body)
+        return params
+
+    def do_POST(self):
+        if self.path == '/cancel':
+            params = self._read_params()
+            job_id = params.get('job_id')
+            if isinstance(job_id, list):
+                job_id = job_id[0]
+            if not job_id:
+                return self._send_json({'error': 'job_id required'}, status=HTTPStatus.BAD_REQUEST)
+            return self._send_json({'job_id': job_id, 'cancelled': cancel_job(job_id)})
+
+        if self.path != '/generate':
+            self.send_error(HTTPStatus.NOT_FOUND, 'Unknown endpoint')
+            return
+
+        params = self._read_params()
 
         text = params.get('text') or params.get('prompt')
         if isinstance(text, list):
             text = text[0]
 
+        job_id = params.get('job_id')
+        if isinstance(job_id, list):
+            job_id = job_id[0]
+        if job_id:
+            with JOBS_LOCK:
+                cancelled_early = EARLY_CANCELS.pop(job_id, None) is not None
+                if not cancelled_early:
+                    JOBS[job_id] = {'proc': None, 'cancelled': False}
+            if cancelled_early:
+                return self._send_json({'error': 'cancelled', 'job_id': job_id}, status=HTTPStatus.CONFLICT)
+
         try:
             from one_liner import generate
             if text:
@@ -85,17 +170,17 @@ class APIHandler(SimpleHTTPRequestHandler):
             # Run TTS (no playback)
             cmd_tts = [sys.executable, 'tts_smoke.py', text_to_use, '--out', str(wav), '--no-play']
             self.log_message('Running TTS: %s', ' '.join(cmd_tts))
-            subprocess.run(cmd_tts, check=True)
+            run_step(job_id, cmd_tts)
 
             # Compute envelope
             cmd_env = [sys.executable, 'envelope.py', str(wav), '--frame-ms', '30', '--out', str(env)]
             self.log_message('Running envelope: %s', ' '.join(cmd_env))
-            subprocess.run(cmd_env, check=True)
+            run_step(job_id, cmd_env)
 
             # Build frames
             cmd_vis = [sys.executable, 'visualize.py', str(env), '--out', str(frames)]
             self.log_message('Running visualize: %s', ' '.join(cmd_vis))
-            subprocess.run(cmd_vis, check=True)
+            run_step(job_id, cmd_vis)
 
             resp = {'audio': wav.name, 'frames': frames.name, 'text': text_to_use}
             data = json.dumps(resp).encode('utf-8')
@@ -104,6 +189,8 @@ class APIHandler(SimpleHTTPRequestHandler):
             self.send_header('Content-Length', str(len(data)))
             self.end_headers()
             self.wfile.write(data)
+        except JobCancelled:
+            self._send_json({'error': 'cancelled', 'job_id': job_id}, status=HTTPStatus.CONFLICT)
         except subprocess.CalledProcessError as e:
             self.send_response(HTTPStatus.INTERNAL_SERVER_ERROR)
             msg = {'error': 'generation failed', 'detail': str(e)}
@@ -120,11 +207,18 @@ class APIHandler(SimpleHTTPRequestHandler):
             self.send_header('Content-Length', str(len(data)))
             self.end_headers()
             self.wfile.write(data)
+        finally:
+            if job_id:
+                with JOBS_LOCK:
+                    JOBS.pop(job_id, None)
+                    now = time.monotonic()
+                    _prune(FINISHED_JOBS, now)
+                    FINISHED_JOBS[job_id] = now
 
 
 def run(host='0.0.0.0', port=8000):
     server_address = (host, port)
-    httpd = HTTPServer(server_address, APIHandler)
+    httpd = ThreadingHTTPServer(server_address, APIHandler)
     print(f"AI-Pumpkin API server serving {ROOT} at http://{host}:{port}/")
     try:
         httpd.serve_forever()
@@ -8,6 +8,11 @@ on each press it:
   - Runs `envelope.py` on the generated WAV and prints a small JSON array of
     discrete mouth frames to stdout.
 
+Presses go through a `TriggerScheduler`: bouncy or mashed presses are
+debounced, at most `--max-pending` presses wait while a generation runs, and
+`--overlap` (drop / replace-latest / interrupt) decides what happens to extra
+presses. Interrupting cancels the in-flight job via the server's /cancel.
+
 Designed for HID keyboard-style USB buttons (they emulate a keyboard and send
 space or another key). No serial / pyserial required.
 """
@@ -15,11 +20,15 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Callable, Deque, List, Optional
 
 
 def timestamped_filename(prefix: str = "output", ext: str = "wav") -> str:
@@ -53,46 +62,234 @@ def compute_envelope_and_print(wav_path: Path, frame_ms: int = 30) -> List[dict]
     return mouth
 
 
-def keyboard_loop(trigger_key: bytes, text: str):
+OVERLAP_POLICIES = ("drop", "replace-latest", "interrupt")
+
+
+class TriggerScheduler:
+    """Debounce trigger presses and keep a bounded queue of pending presses.
+
+    Presses within `debounce_s` of the last accepted press are coalesced into
+    it. While a job is in flight, up to `max_pending` presses wait in the
+    queue; `policy` decides what happens to further presses:
+      - "drop": the new press is dropped once the queue is full.
+      - "replace-latest": once the queue is full, the newest pending press is
+        replaced by the new one.
+      - "interrupt": any press while busy cancels the in-flight job (via
+        `on_cancel`) and replaces whatever is pending, regardless of
+        `max_pending`.
+
+    A cancelled job still counts as in flight until the worker calls
+    `finish()` for it, so the queue stays bounded while the cancel lands.
+    `on_cancel` is called from `press()` and must not block.
+
+    All timing comes from `clock` (or the explicit `t` passed to `press`), so a
+    synthetic keypress timeline can be fed through `press`/`next_job`/`finish`
+    without a keyboard or server.
+    """
+
+    def __init__(self, debounce_s: float = 0.3, max_pending: int = 1, policy: str = "drop",
+                 clock: Callable[[], float] = time.monotonic,
+                 on_cancel: Optional[Callable[[str], None]] = None):
+        if policy not in OVERLAP_POLICIES:
+            raise ValueError(f"policy must be one of {OVERLAP_POLICIES}, got {policy!r}")
+        if max_pending < 0:
+            raise ValueError("max_pending must be >= 0")
+        self.debounce_s = debounce_s
+        self.max_pending = max_pending
+        self.policy = policy
+        self.clock = clock
+        self.on_cancel = on_cancel
+        self.pending: Deque[str] = deque()
+        self.in_flight: Optional[str] = None
+        self.cancelling = False
+        self.stats = {"pressed": 0, "accepted": 0, "coalesced": 0, "dropped": 0,
+                      "replaced": 0, "cancelled": 0, "started": 0, "finished": 0}
+        self._last_accepted: Optional[float] = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _new_job_id(self) -> str:
+        self._seq += 1
+        return f"press-{os.getpid()}-{self._seq}"
+
+    def press(self, t: Optional[float] = None) -> str:
+        """Register a press at time `t` and return its outcome.
+
+        Outcome is one of "accepted", "coalesced", "dropped", "replaced" or
+        "interrupted".
+        """
+        cancel_id = None
+        with self._cond:
+            now = self.clock() if t is None else t
+            self.stats["pressed"] += 1
+            if self._last_accepted is not None and now - self._last_accepted < self.debounce_s:
+                self.stats["coalesced"] += 1
+                return "coalesced"
+
+            busy = self.in_flight is not None
+            # An idle worker still needs room for the press it is about to pick up.
+            capacity = self.max_pending if busy else max(self.max_pending, 1)
+            if busy and self.policy == "interrupt":
+                if self.cancelling and self.pending:
+                    # Already cancelled; this press just takes over the slot.
+                    self.pending.pop()
+                    self.stats["replaced"] += 1
+                    outcome = "replaced"
+                elif self.cancelling:
+                    outcome = "accepted"
+                else:
+                    self.stats["dropped"] += len(self.pending)
+                    self.pending.clear()
+                    cancel_id = self.in_flight
+                    self.cancelling = True
+                    self.stats["cancelled"] += 1
+                    outcome = "interrupted"
+            elif len(self.pending) < capacity:
+                outcome = "accepted"
+            elif self.policy != "drop" and self.pending:
+                self.pending.pop()
+                self.stats["replaced"] += 1
+                outcome = "replaced"
+            else:
+                # "drop", or "replace-latest" with max_pending=0
+                self.stats["dropped"] += 1
+                return "dropped"
+
+            self._last_accepted = now
+            self.stats["accepted"] += 1
+            self.pending.append(self._new_job_id())
+            self._cond.notify_all()
+
+        if cancel_id is not None and self.on_cancel is not None:
+            self.on_cancel(cancel_id)
+        return outcome
+
+    def next_job(self, timeout: Optional[float] = 0.0) -> Optional[str]:
+        """Pop the oldest pending press and mark it in flight.
+
+        Returns None if nothing is pending (after waiting up to `timeout`
+        seconds; `timeout=None` waits until a press arrives or `close()`).
+        """
+        with self._cond:
+            if self.in_flight is None and not self.pending and timeout != 0.0:
+                self._cond.wait_for(lambda: self._closed or (self.in_flight is None and self.pending),
+                                    timeout)
+            if self.in_flight is not None or not self.pending:
+                return None
+            self.in_flight = self.pending.popleft()
+            self.stats["started"] += 1
+            return self.in_flight
+
+    def finish(self, job_id: str) -> bool:
+        """Mark `job_id` finished. Returns False if it was cancelled or is not in flight."""
+        with self._cond:
+            if self.in_flight != job_id:
+                return False
+            cancelled = self.cancelling
+            self.in_flight = None
+            self.cancelling = False
+            if not cancelled:
+                self.stats["finished"] += 1
+            self._cond.notify_all()
+            return not cancelled
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def post_generate(job_id: str, url: str = "http://localhost:8000"):
+    """POST /generate for one press; start the API server detached if it is not running."""
+    import requests
+
+    try:
+        return requests.post(f"{url}/generate", json={"job_id": job_id})
+    except requests.ConnectionError:
+        print('API server not running; starting detached server...')
+        subprocess.Popen([sys.executable, 'api_server.py'], cwd=str(Path('.').absolute()),
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # wait briefly and retry
+        time.sleep(0.5)
+        return requests.post(f"{url}/generate", json={"job_id": job_id})
+
+
+def cancel_generate(job_id: str, url: str = "http://localhost:8000") -> None:
+    import requests
+
+    try:
+        requests.post(f"{url}/cancel", json={"job_id": job_id}, timeout=2)
+    except requests.RequestException as e:
+        print(f"Cancel of {job_id} failed: {e}")
+
+
+def cancel_in_background(job_id: str, url: str = "http://localhost:8000") -> None:
+    """Send /cancel from a short-lived thread so the keyboard loop never blocks on it."""
+    threading.Thread(target=cancel_generate, args=(job_id, url), daemon=True).start()
+
+
+def generation_worker(scheduler: TriggerScheduler, url: str = "http://localhost:8000") -> None:
+    while not scheduler.closed:
+        job_id = scheduler.next_job(timeout=None)
+        if job_id is None:
+            continue
+        print(f'Requesting generation ({job_id})...')
+        try:
+            resp = post_generate(job_id, url)
+        except Exception as e:
+            print('Generation request failed:', e)
+            scheduler.finish(job_id)
+            continue
+        if not scheduler.finish(job_id):
+            # Superseded by an interrupting press; nobody wants this result.
+            print(f'Discarded result of cancelled job {job_id}')
+        elif resp.ok:
+            j = resp.json()
+            print('Generated:', j.get('text'))
+            print('Audio:', j.get('audio'), 'Frames:', j.get('frames'))
+        else:
+            print('Generation failed:', resp.text)
+
+
+def keyboard_loop(trigger_key: bytes, text: str, scheduler: Optional[TriggerScheduler] = None,
+                  url: str = "http://localhost:8000"):
     print(f"Keyboard mode: press '{trigger_key.decode()}' (or Ctrl-C to quit)")
+    if scheduler is None:
+        scheduler = TriggerScheduler(on_cancel=lambda job_id: cancel_in_background(job_id, url))
+    worker = threading.Thread(target=generation_worker, args=(scheduler, url), daemon=True)
+    worker.start()
     try:
         import msvcrt
-        import requests
 
         while True:
             ch = msvcrt.getch()
             if ch == trigger_key:
-                print('Trigger pressed — requesting generation...')
-                # Try to call local API server /generate; if not available, start it detached
-                try:
-                    resp = requests.post('http://localhost:8000/generate', json={})
-                except Exception:
-                    # start server detached
-                    print('API server not running; starting detached server...')
-                    import subprocess
-                    subprocess.Popen([sys.executable, 'api_server.py'], cwd=str(Path('.').absolute()), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                    # wait briefly and retry
-                    import time
-                    time.sleep(0.5)
-                    resp = requests.post('http://localhost:8000/generate', json={})
-
-                if resp.ok:
-                    j = resp.json()
-                    print('Generated:', j.get('text'))
-                    print('Audio:', j.get('audio'), 'Frames:', j.get('frames'))
-                else:
-                    print('Generation failed:', resp.text)
+                outcome = scheduler.press()
+                print(f'Trigger pressed — {outcome}')
             else:
                 # ignore other keys
                 continue
     except KeyboardInterrupt:
         print("Exiting keyboard loop")
+    finally:
+        scheduler.close()
+        print('Trigger stats:', json.dumps(scheduler.stats))
 
 
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--key", default=" ", help="Trigger key (single character). Default is space")
     p.add_argument("--text", default="Happy Spooky Halloween", help="Text to speak on trigger")
+    p.add_argument("--debounce-ms", type=int, default=300, help="Ignore presses within this window of the last accepted press")
+    p.add_argument("--max-pending", type=int, default=1, help="Presses to queue while a generation is running")
+    p.add_argument("--overlap", choices=OVERLAP_POLICIES, default="drop",
+                   help="What to do with a press when busy and the queue is full")
+    p.add_argument("--url", default="http://localhost:8000", help="API server base URL")
     args = p.parse_args()
 
     key = args.key
@@ -101,7 +298,10 @@ def main():
         sys.exit(2)
 
     trigger_key = key.encode('utf-8')
-    keyboard_loop(trigger_key, args.text)
+    scheduler = TriggerScheduler(debounce_s=args.debounce_ms / 1000.0, max_pending=args.max_pending,
+                                 policy=args.overlap,
+                                 on_cancel=lambda job_id: cancel_in_background(job_id, args.url))
+    keyboard_loop(trigger_key, args.text, scheduler, args.url)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""Job cancellation in api_server."""
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api_server
+
+SLOW_CMD = [sys.executable, '-c', 'import time; time.sleep(5)']
+
+
+def post(port, path, obj):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(obj).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def port():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), api_server.APIHandler)
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield httpd.server_address[1]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def cancel_when_running(job_id):
+    def cancel():
+        while api_server.JOBS.get(job_id, {}).get('proc') is None:
+            time.sleep(0.01)
+        api_server.cancel_job(job_id)
+    threading.Thread(target=cancel, daemon=True).start()
+
+
+def test_cancel_kills_running_step():
+    api_server.JOBS['running-1'] = {'proc': None, 'cancelled': False}
+    try:
+        cancel_when_running('running-1')
+        start = time.monotonic()
+        with pytest.raises(api_server.JobCancelled):
+            api_server.run_step('running-1', SLOW_CMD)
+        assert time.monotonic() - start < 2
+    finally:
+        api_server.JOBS.pop('running-1', None)
+
+
+def test_cancel_during_generate_returns_409(port, monkeypatch):
+    real_run_step = api_server.run_step
+    monkeypatch.setattr(api_server, 'run_step', lambda job_id, cmd: real_run_step(job_id, SLOW_CMD))
+    cancel_when_running('running-2')
+    start = time.monotonic()
+    status, body = post(port, '/generate', {'job_id': 'running-2', 'text': 'boo'})
+    assert status == 409 and body['error'] == 'cancelled'
+    assert time.monotonic() - start < 2
+    assert 'running-2' not in api_server.JOBS
+
+
+def test_late_cancel_leaves_no_marker(port, monkeypatch):
+    monkeypatch.setattr(api_server, 'run_step', lambda job_id, cmd: None)
+    status, _ = post(port, '/generate', {'job_id': 'done-1', 'text': 'boo'})
+    assert status == 200
+    status, body = post(port, '/cancel', {'job_id': 'done-1'})
+    assert status == 200 and body['cancelled'] is False
+    assert 'done-1' not in api_server.EARLY_CANCELS
+
+
+def test_cancel_before_generate_rejects_job(port):
+    status, body = post(port, '/cancel', {'job_id': 'early-1'})
+    assert status == 200 and body['cancelled'] is False
+    assert 'early-1' in api_server.EARLY_CANCELS
+
+    status, body = post(port, '/generate', {'job_id': 'early-1', 'text': 'boo'})
+    assert status == 409 and body['error'] == 'cancelled'
+    assert 'early-1' not in api_server.EARLY_CANCELS
+    assert 'early-1' not in api_server.JOBS
@@ -0,0 +1,126 @@
+"""Synthetic keypress timelines for button_trigger.TriggerScheduler."""
+import pytest
+
+from button_trigger import TriggerScheduler
+
+
+def make(policy, max_pending=1, debounce_s=0.3):
+    cancelled = []
+    sched = TriggerScheduler(debounce_s=debounce_s, max_pending=max_pending, policy=policy,
+                             clock=lambda: 0.0, on_cancel=cancelled.append)
+    return sched, cancelled
+
+
+def test_bounce_is_coalesced():
+    sched, _ = make("drop")
+    assert [sched.press(t) for t in (0.0, 0.05, 0.1, 0.29)] == ["accepted"] + ["coalesced"] * 3
+    assert sched.stats["coalesced"] == 3
+    assert len(sched.pending) == 1
+
+
+def test_idle_presses_stay_bounded():
+    sched, _ = make("drop")
+    assert [sched.press(t) for t in (0.0, 1.0, 2.0)] == ["accepted", "dropped", "dropped"]
+    assert len(sched.pending) == 1
+
+
+def test_drop_policy():
+    sched, cancelled = make("drop")
+    sched.press(0.0)
+    first = sched.next_job()
+    assert [sched.press(t) for t in (1.0, 2.0, 3.0)] == ["accepted", "dropped", "dropped"]
+    assert sched.stats["dropped"] == 2
+    assert len(sched.pending) == 1
+    assert sched.finish(first)
+    assert sched.next_job() is not None
+    assert cancelled == []
+
+
+def test_replace_latest_policy():
+    sched, cancelled = make("replace-latest")
+    sched.press(0.0)
+    first = sched.next_job()
+    assert [sched.press(t) for t in (1.0, 2.0, 3.0)] == ["accepted", "replaced", "replaced"]
+    assert sched.stats["replaced"] == 2
+    latest = sched.pending[-1]
+    assert len(sched.pending) == 1
+    assert sched.finish(first)
+    assert sched.next_job() == latest
+    assert cancelled == []
+
+
+def test_interrupt_cancels_on_first_overlapping_press():
+    sched, cancelled = make("interrupt")
+    sched.press(0.0)
+    first = sched.next_job()
+    assert sched.press(1.0) == "interrupted"
+    assert cancelled == [first]
+    assert sched.stats["cancelled"] == 1
+    # The cancelled job's result is discarded and the new press runs next.
+    replacement = sched.pending[0]
+    assert not sched.finish(first)
+    assert sched.next_job() == replacement
+    assert sched.stats["finished"] == 0
+
+
+@pytest.mark.parametrize("max_pending", [0, 1, 3])
+def test_interrupt_keeps_queue_bounded_while_cancel_is_pending(max_pending):
+    sched, cancelled = make("interrupt", max_pending=max_pending)
+    sched.press(0.0)
+    first = sched.next_job()
+    outcomes = [sched.press(float(t)) for t in range(1, 7)]
+    assert outcomes == ["interrupted"] + ["replaced"] * 5
+    assert cancelled == [first]
+    assert len(sched.pending) == 1
+    assert sched.in_flight == first
+    assert sched.next_job() is None  # worker is still stuck on the cancelled job
+    assert not sched.finish(first)
+    nxt = sched.next_job()
+    assert nxt is not None and nxt == sched.in_flight
+
+
+def test_drop_with_no_queue():
+    sched, _ = make("replace-latest", max_pending=0)
+    sched.press(0.0)
+    sched.next_job()
+    assert sched.press(1.0) == "dropped"
+    assert not sched.pending
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        TriggerScheduler(policy="queue-everything")
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("drop", {"pressed": 6, "accepted": 2, "coalesced": 1, "dropped": 3,
+              "replaced": 0, "cancelled": 0, "started": 1, "finished": 0}),
+    ("replace-latest", {"pressed": 6, "accepted": 5, "coalesced": 1, "dropped": 0,
+                        "replaced": 3, "cancelled": 0, "started": 1, "finished": 0}),
+    ("interrupt", {"pressed": 6, "accepted": 5, "coalesced": 1, "dropped": 0,
+                   "replaced": 3, "cancelled": 1, "started": 1, "finished": 0}),
+])
+def test_stats_account_for_every_press(policy, expected):
+    sched, _ = make(policy)
+    sched.press(0.0)
+    sched.next_job()
+    sched.press(0.1)  # bounce
+    for t in (1.0, 2.0, 3.0, 4.0):
+        sched.press(t)
+    assert sched.stats == expected
+    assert len(sched.pending) == 1
+    stats = sched.stats
+    assert stats["pressed"] == stats["accepted"] + stats["coalesced"] + stats["dropped"]
+
+
+def test_interrupt_drops_queued_presses_once():
+    sched, cancelled = make("interrupt", max_pending=3)
+    for t in (0.0, 1.0, 2.0):  # queued while the worker was idle
+        sched.press(t)
+    first = sched.next_job()
+    assert sched.press(3.0) == "interrupted"
+    assert sched.press(4.0) == "replaced"
+    assert cancelled == [first]
+    assert sched.stats["dropped"] == 2
+    assert sched.stats["replaced"] == 1
+    assert len(sched.pending) == 1